@@ -17,7 +17,7 @@ def read_conll(path: Path):
     with path.open(encoding="utf-8", errors="ignore") as f:
         for line in f:
             line = line.rstrip("\n")
-            if not line:
+            if not line.strip():  # separators in wnut17train.conll are tab-only lines
                 if tokens:
                     sents.append({"tokens": tokens, "tags": tags})
                     tokens, tags = [], []
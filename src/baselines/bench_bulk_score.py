@@ -0,0 +1,30 @@
+# src/baselines/bench_bulk_score.py
+# Rows/sec of bulk_score.py (intent + NER) for 1, 2 and 4 workers on the same CSV input. Each run is a
+# fresh process pool, so the figures include per-worker artifact loading as a real backfill would.
+import json, os, subprocess, sys, tempfile
+from pathlib import Path
+import pandas as pd
+from arrow_data import banking77_split
+
+OUT = Path("artifacts/baselines/bulk_bench.json")
+N_ROWS = 20_000
+CHUNK_ROWS = 1_000
+WORKERS = [1, 2, 4]
+
+def main():
+    texts = banking77_split("test")["text_norm"].tolist()
+    report = {"n_rows": N_ROWS, "chunk_rows": CHUNK_ROWS, "cpu_count": os.cpu_count(), "workers": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        inp = Path(tmp)/"in.csv"
+        pd.DataFrame({"text": (texts * (N_ROWS // len(texts) + 1))[:N_ROWS]}).to_csv(inp, index=False)
+        for w in WORKERS:
+            out = Path(tmp)/f"out_w{w}"
+            subprocess.run([sys.executable, "-W", "ignore", "src/baselines/bulk_score.py", str(inp), "--out", str(out),
+                            "--chunk-rows", str(CHUNK_ROWS), "--workers", str(w)], check=True, capture_output=True)
+            s = json.loads((out/"_summary.json").read_text())
+            report["workers"][str(w)] = {"rows_per_sec": s["rows_per_sec"], "seconds": s["seconds"]}
+    OUT.write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
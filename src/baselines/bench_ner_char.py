@@ -0,0 +1,59 @@
+# src/baselines/bench_ner_char.py
+# Compares the word-only BiLSTM-CRF against the char-CNN variant trained by ner_bilstm_crf.py:
+# test micro-F1, and per-batch serving latency with and without the per-word char cache.
+import json, math, time
+from pathlib import Path
+import numpy as np
+import torch
+from arrow_data import ner_split
+from ner_bilstm_crf import (ART_DIR, BATCH, ENTITY_IDS, TAGS, UNK_ID, WORD2ID, WORD_ONLY_CKPT, BiLSTM_CRF,
+                            encode, evaluate, load_for_inference, tag_batch)
+
+MIN_SAMPLES = 500  # timed calls per latency row; small sentence sets are repeated until they reach it
+
+def time_batches(model, sents, batch):
+    if not sents:
+        return None
+    batches = [sents[i:i+batch] for i in range(0, len(sents), batch)]
+    tag_batch(model, batches[0])  # warm-up, not timed
+    times = []
+    for _ in range(math.ceil(MIN_SAMPLES / len(batches))):
+        for b in batches:
+            t0 = time.perf_counter()
+            tag_batch(model, b)
+            times.append(time.perf_counter() - t0)
+    ms = np.array(times) * 1000
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)), "n_samples": len(ms)}
+
+def latency(models, sents):
+    # single-request (batch of 1) and batched latency for each model on the same sentences
+    return {f"batch_{b}": {name: time_batches(m, sents, b) for name, m in models.items()} for b in (1, BATCH)}
+
+def main():
+    if not WORD_ONLY_CKPT.exists():
+        raise SystemExit(f"{WORD_ONLY_CKPT} missing; train it once with: python src/baselines/ner_bilstm_crf.py --word-only")
+    torch.set_num_threads(1)
+    word_only = BiLSTM_CRF(len(WORD2ID), len(TAGS))
+    word_only.load_state_dict(torch.load(WORD_ONLY_CKPT))
+    chars = load_for_inference()
+    uncached = load_for_inference()
+    uncached.char_cache = None
+    models = {"word_only": word_only, "char_cached": chars, "char_uncached": uncached}
+
+    sents = ner_split("test")[0]
+    known = [ts for ts in sents if UNK_ID not in encode(ts)]
+    with_oov = [ts for ts in sents if UNK_ID in encode(ts)]
+
+    report = {
+        "test_micro_f1": {"word_only": evaluate(word_only, "test"), "char_cnn": evaluate(chars, "test")},
+        "test_entity_f1": {"word_only": evaluate(word_only, "test", ENTITY_IDS),
+                           "char_cnn": evaluate(chars, "test", ENTITY_IDS)},
+        "n_sents": {"known_only": len(known), "with_oov": len(with_oov)},
+        "latency_known_only": latency(models, known),
+        "latency_with_oov": latency(models, with_oov),
+    }
+    (ART_DIR/"char_bench.json").write_text(json.dumps(report, indent=2))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
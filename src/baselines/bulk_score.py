@@ -0,0 +1,216 @@
+# src/baselines/bulk_score.py
+# Offline bulk scoring for backfills: streams CSV/Parquet/JSONL in fixed-size chunks, scores each chunk
+# (intent + NER) in a process pool whose workers load the artifacts once, and writes one Parquet part
+# per chunk. Completed chunk ids go to _checkpoint.json, so re-running the same command resumes.
+#
+#   python src/baselines/bulk_score.py data/in.parquet --out artifacts/bulk/run1 --workers 8
+import argparse, json, os, re, sys, time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append("bin")
+from normalize import normalize_text
+from model_registry import score_intent
+
+INTENT_DIR = Path("artifacts/baselines/intent")
+LABELS = Path("data/processed/label_maps/intent_label_map.json")
+
+CHUNK_ROWS = 50_000
+NER_BATCH = 256
+# Follows the WNUT-17 train split, which defines the vocab (space-joined gold tokens round-trip for
+# 853/1000 train, 1008/1009 val, 1284/1287 test sentences; the train misses are inconsistent annotation).
+# Pass --tokens-col to skip this entirely for pre-tokenized input.
+TOKEN_RE = re.compile(r"""
+    (?:https?://|www\.)\S+                 # urls stay whole
+  | [<>]?[:;=][\-o*']?[)\](\[dDpP/\\|@3]+  # emoticons  :)  ;-P  :'(  =D
+  | <3
+  | &\w+;                                  # html entities left in tweets: &amp; &lt;
+  | [@#]\w+                                # mentions, hashtags
+  | '[sS]\b                                # possessive/is split off:  It|'s
+  | \d+(?:[.,:]\d+)+                       # 3.5  1,000  10:30
+  | \w+(?:-\w+)*(?:'(?:t|m|re|ve|ll|d)\b|-(?!\S))?  # words; don't/I'm/we'll stay whole as in train
+  | [!?]+ | \.{2,} | -{2,} | [^\w\s]        # punctuation runs, then any other symbol alone
+""", re.X)
+
+_W = {}  # per-worker state, filled once by _init_worker
+
+def read_chunks(path: Path, cols, chunk_rows: int, done=frozenset()):
+    # yields (chunk_id, first row_id, {col: list}) for every chunk not in `done`. Values stay strings:
+    # no "007" -> 7, no "NA"/"null" -> "nan". Finished work is skipped as early as the format allows.
+    if path.suffix == ".parquet":
+        # chunks never straddle row groups, so a row group whose chunks are all done is not read at all
+        pf = pq.ParquetFile(path)
+        chunk_id = start = 0
+        for rg in range(pf.num_row_groups):
+            n = pf.metadata.row_group(rg).num_rows
+            ids = range(chunk_id, chunk_id + -(-n // chunk_rows))
+            if any(i not in done for i in ids):
+                row = start
+                for i, b in zip(ids, pf.iter_batches(batch_size=chunk_rows, row_groups=[rg], columns=cols)):
+                    if i not in done:
+                        yield i, row, {c: b.column(c).to_pylist() for c in cols}
+                    row += b.num_rows
+            chunk_id += len(ids); start += n
+        return
+    skip = 0  # the finished prefix is skipped without parsing; later done chunks are parsed but dropped
+    while skip in done:
+        skip += 1
+    if path.suffix in (".jsonl", ".json"):
+        with path.open(encoding="utf-8") as f:
+            # pandas chunks jsonl by raw lines (blank ones included); row ids count records only
+            start = 0
+            for _ in range(skip * chunk_rows):
+                line = f.readline()
+                if not line:
+                    return
+                start += bool(line.strip())
+            for chunk_id, df in enumerate(pd.read_json(f, lines=True, chunksize=chunk_rows, dtype=False), skip):
+                if chunk_id not in done:
+                    yield chunk_id, start, {c: df[c].tolist() for c in cols}
+                start += len(df)
+    else:
+        # skiprows counts records, not lines, so quoted newlines can't shift the chunk grid
+        reader = pd.read_csv(path, usecols=cols, chunksize=chunk_rows, dtype=str, keep_default_na=False,
+                             skiprows=range(1, skip * chunk_rows + 1))
+        for chunk_id, df in enumerate(reader, skip):
+            if chunk_id not in done:
+                yield chunk_id, chunk_id * chunk_rows, {c: df[c].tolist() for c in cols}
+
+def _missing(v):
+    return v is None or (not isinstance(v, (list, tuple, np.ndarray)) and pd.isna(v))
+
+def as_tokens(v):
+    # list columns (parquet/jsonl) pass through; csv cells are whitespace-separated tokens; null -> []
+    if _missing(v):
+        return []
+    return [str(t) for t in v] if isinstance(v, (list, tuple, np.ndarray)) else str(v).split()
+
+def _init_worker(with_ner: bool):
+    import joblib
+    _W["vec"] = joblib.load(INTENT_DIR/"tfidf.joblib")
+    _W["clf"] = joblib.load(INTENT_DIR/"logreg.joblib")
+    _W["labels"] = np.array(json.loads(LABELS.read_text(encoding="utf-8"))["labels"])
+    _W["ner"] = None
+    if with_ner:
+        import torch
+        torch.set_num_threads(1)  # one core per worker; the pool provides the parallelism
+        import ner_bilstm_crf
+        _W["ner"] = ner_bilstm_crf.load_for_inference()
+        _W["tag_batch"] = ner_bilstm_crf.tag_batch
+        _W["maxlen"] = ner_bilstm_crf.MAXLEN
+
+def _tag_all(tokens):
+    # length-sorted sub-batches keep padding (and CRF decode work) small
+    order = sorted(range(len(tokens)), key=lambda i: len(tokens[i]))
+    tags = [None] * len(tokens)
+    for i in range(0, len(order), NER_BATCH):
+        idx = [k for k in order[i:i+NER_BATCH] if tokens[k]]
+        if idx:
+            for k, t in zip(idx, _W["tag_batch"](_W["ner"], [tokens[k] for k in idx])):
+                tags[k] = t
+    return [t if t is not None else [] for t in tags]
+
+def score_chunk(chunk_id: int, start: int, texts, tokens, out_dir: str):
+    # rows with no text get null intent columns and empty tokens/ner_tags rather than a guess for ""
+    null = np.array([_missing(t) for t in texts], dtype=bool)
+    texts = ["" if m else str(t) for t, m in zip(texts, null)]
+    ids, conf = score_intent(_W["vec"], _W["clf"], texts)
+    cols = {
+        "row_id": np.arange(start, start + len(texts), dtype=np.int64),
+        "intent_id": pa.array(ids.astype(np.int32), mask=null),
+        "intent": pa.array(_W["labels"][ids], mask=null),
+        "intent_conf": pa.array(conf.astype(np.float32), mask=null),
+    }
+    if _W["ner"] is not None:
+        if tokens is not None:
+            tokens = [as_tokens(v) for v in tokens]
+        else:
+            tokens = [TOKEN_RE.findall(normalize_text(t, lowercase=False)) for t in texts]
+        # the tagger clips at MAXLEN, so clip here too and keep tokens/ner_tags the same length
+        tokens = [ts[:_W["maxlen"]] for ts in tokens]
+        cols["tokens"] = pa.array(tokens, pa.list_(pa.string()))
+        cols["ner_tags"] = pa.array(_tag_all(tokens), pa.list_(pa.string()))
+    out = Path(out_dir)/f"part-{chunk_id:06d}.parquet"
+    tmp = out.with_suffix(".parquet.tmp")
+    pq.write_table(pa.table(cols), tmp)
+    tmp.replace(out)
+    return chunk_id, len(texts)
+
+def run_config(args):
+    # everything that changes which rows land in a part or what schema it has
+    return {"input": str(args.input), "chunk_rows": args.chunk_rows, "text_col": args.text_col,
+            "tokens_col": args.tokens_col, "with_ner": not args.no_ner}
+
+def load_checkpoint(path: Path, args):
+    if not path.exists():
+        return set()
+    ck = json.loads(path.read_text())
+    cfg = run_config(args)
+    diff = {k: (ck.get(k), v) for k, v in cfg.items() if ck.get(k) != v}
+    if diff:
+        raise SystemExit(f"{path} was written with different settings {diff}; use a fresh --out.")
+    return set(ck["done"])
+
+def save_checkpoint(path: Path, args, done):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({**run_config(args), "done": sorted(done)}))
+    tmp.replace(path)
+
+def _collect(finished, done, ck_path, args, t0, rows_so_far):
+    n = 0
+    for f in finished:
+        chunk_id, k = f.result()
+        done.add(chunk_id); n += k
+    save_checkpoint(ck_path, args, done)
+    rows = rows_so_far + n
+    print(f"chunks={len(done)} rows={rows} rows/sec={rows / (time.perf_counter() - t0):.0f}")
+    return n
+
+def main():
+    ap = argparse.ArgumentParser(description="Bulk intent + NER scoring to Parquet parts.")
+    ap.add_argument("input", type=Path, help=".csv, .parquet or .jsonl with a text column")
+    ap.add_argument("--out", type=Path, required=True)
+    ap.add_argument("--text-col", default="text")
+    ap.add_argument("--tokens-col", help="pre-tokenized NER input (list column, or space-separated in csv)")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--no-ner", action="store_true", help="intent only")
+    ap.add_argument("--max-chunks", type=int, help="stop after scoring this many chunks; re-run to resume")
+    args = ap.parse_args()
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    ck_path = args.out/"_checkpoint.json"
+    done = load_checkpoint(ck_path, args)
+    if done:
+        print(f"Resuming: {len(done)} chunks already scored.")
+
+    t0 = time.perf_counter(); rows = 0
+    max_inflight = 2 * args.workers  # bounds memory: at most this many chunks read ahead
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(not args.no_ner,)) as pool:
+        pending, submitted = set(), 0
+        cols = [args.text_col] + ([args.tokens_col] if args.tokens_col else [])
+        for chunk_id, start, chunk in read_chunks(args.input, cols, args.chunk_rows, frozenset(done)):
+            if submitted == args.max_chunks:
+                break
+            tokens = chunk[args.tokens_col] if args.tokens_col else None
+            pending.add(pool.submit(score_chunk, chunk_id, start, chunk[args.text_col], tokens, str(args.out)))
+            submitted += 1
+            while len(pending) >= max_inflight:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                rows += _collect(finished, done, ck_path, args, t0, rows)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            rows += _collect(finished, done, ck_path, args, t0, rows)
+
+    dt = time.perf_counter() - t0
+    summary = {"rows_scored": rows, "seconds": dt, "rows_per_sec": rows / dt if dt else 0.0,
+               "workers": args.workers, "chunks_done": len(done)}
+    (args.out/"_summary.json").write_text(json.dumps(summary, indent=2))
+    print("Bulk scoring:", summary)
+
+if __name__ == "__main__":
+    main()
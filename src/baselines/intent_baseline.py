@@ -2,24 +2,24 @@
 import json, random
 from pathlib import Path
 import numpy as np
-import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, confusion_matrix, roc_auc_score
 from sklearn.utils import shuffle as sk_shuffle
 import joblib
 import matplotlib.pyplot as plt
+from arrow_data import banking77_split
 
 SEED = 42
 random.seed(SEED); np.random.seed(SEED)
 
-DATA_DIR = Path("data/processed/banking77")
 ART_DIR  = Path("artifacts/baselines/intent"); ART_DIR.mkdir(parents=True, exist_ok=True)
 
 def load_banking77():
-    tr = pd.read_csv(DATA_DIR/"train.csv")
-    va = pd.read_csv(DATA_DIR/"val.csv")
-    te = pd.read_csv(DATA_DIR/"test.csv")
+    # memory-mapped Arrow splits, projected to the two columns training/eval use
+    tr = banking77_split("train")
+    va = banking77_split("val")
+    te = banking77_split("test")
     return tr, va, te
 
 def plot_confusion(y_true, y_pred, labels, out_png, max_labels=30):
@@ -35,7 +35,7 @@ def plot_confusion(y_true, y_pred, labels, out_png, max_labels=30):
 def train_eval_once(tr, va, vec_params, C):
     vec = TfidfVectorizer(**vec_params).fit(tr["text_norm"].tolist())
     Xtr, Xva = vec.transform(tr["text_norm"]), vec.transform(va["text_norm"])
-    ytr, yva = tr["intent_id"].to_numpy(), va["intent_id"].to_numpy()
+    ytr, yva = tr["intent_id"], va["intent_id"]
     clf = LogisticRegression(C=C, max_iter=2000, n_jobs=-1, solver="lbfgs", multi_class="auto")
     clf.fit(Xtr, ytr)
     yp_tr = clf.predict(Xtr); yp_va = clf.predict(Xva)
@@ -74,7 +74,7 @@ def finalize_and_save(best, tr, va, te):
 
     # test eval
     Xtr, Xva, Xte = vec.transform(tr["text_norm"]), vec.transform(va["text_norm"]), vec.transform(te["text_norm"])
-    ytr, yva, yte = tr["intent_id"].to_numpy(), va["intent_id"].to_numpy(), te["intent_id"].to_numpy()
+    ytr, yva, yte = tr["intent_id"], va["intent_id"], te["intent_id"]
     acc_tr = accuracy_score(ytr, clf.predict(Xtr))
     acc_va = accuracy_score(yva, clf.predict(Xva))
     yp_te  = clf.predict(Xte); acc_te = accuracy_score(yte, yp_te)
@@ -95,7 +95,7 @@ def randomized_label_sanity(tr, va, vec):
     from sklearn.linear_model import LogisticRegression
     from sklearn.metrics import accuracy_score
     Xtr = vec.transform(tr["text_norm"]); Xva = vec.transform(va["text_norm"])
-    ytr = tr["intent_id"].to_numpy()
+    ytr = tr["intent_id"]
     ytr_rand = sk_shuffle(ytr, random_state=SEED)
     clf = LogisticRegression(C=0.5, max_iter=1000, n_jobs=-1, solver="lbfgs", multi_class="auto")
     clf.fit(Xtr, ytr_rand)
@@ -120,7 +120,7 @@ def oos_auroc(vec, clf):
     oos_texts = [t.strip() for t in oos_texts if t and isinstance(t, str)]
     if len(oos_texts) > 2000:
         rng = np.random.default_rng(SEED); oos_texts = list(rng.choice(oos_texts, size=2000, replace=False))
-    te = pd.read_csv(DATA_DIR/"test.csv")
+    te = banking77_split("test")
     X_ind = vec.transform(te["text_norm"].tolist()); X_oos = vec.transform(oos_texts)
     p_ind = clf.predict_proba(X_ind).max(axis=1); p_oos = clf.predict_proba(X_oos).max(axis=1)
     y_true = np.array([0]*len(p_ind) + [1]*len(p_oos))
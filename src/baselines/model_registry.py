@@ -0,0 +1,294 @@
+# src/baselines/model_registry.py
+# Local versioned registry + hot-swappable predictor.
+#
+# Layout: artifacts/registry/<model>/v0001/{artifact files, manifest.json}, plus a CURRENT pointer file.
+# Versions are immutable once written; promoting or rolling back only rewrites CURRENT.
+#
+#   python src/baselines/model_registry.py register intent      # snapshot artifacts/baselines/intent
+#   python src/baselines/model_registry.py promote intent v0002
+#   python src/baselines/model_registry.py list intent
+import argparse, hashlib, json, os, random, shutil, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import numpy as np
+
+sys.path.append("bin")
+from normalize import normalize_text
+
+REG_DIR = Path("artifacts/registry")
+SRC_DIRS = {"intent": Path("artifacts/baselines/intent"), "ner": Path("artifacts/baselines/ner")}
+# everything a version needs to serve, vocabularies and label maps included, so a rebuilt vocab or
+# label map under data/processed can't silently change what an already-registered version predicts
+FILES = {
+    "intent": ["tfidf.joblib", "logreg.joblib", "intent_label_map.json"],
+    "ner": ["ner_bilstm_crf.pt", "ner_char_cache.pt", "word_vocab.json", "char_vocab.json", "ner_label_map.json"],
+}
+# where register() takes a file from when the artifact dir doesn't carry its own copy
+SHARED_FILES = {
+    "intent_label_map.json": Path("data/processed/label_maps/intent_label_map.json"),
+    "ner_label_map.json": Path("data/processed/label_maps/ner_label_map.json"),
+    "word_vocab.json": Path("data/processed/tokenizers/word_vocab.json"),
+    "char_vocab.json": Path("data/processed/tokenizers/char_vocab.json"),
+}
+KEEP_RESIDENT = 3
+SHADOW_MAX_QUEUE = 64  # shadow samples beyond this backlog are dropped, never queued on the primary path
+
+def sha256(p: Path):
+    h = hashlib.sha256()
+    with p.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _write_atomic(p: Path, text: str):
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, p)
+
+def versions(model: str):
+    d = REG_DIR/model
+    return sorted(v.name for v in d.glob("v[0-9]*") if (v/"manifest.json").exists()) if d.exists() else []
+
+def manifest(model: str, version: str):
+    return json.loads((REG_DIR/model/version/"manifest.json").read_text(encoding="utf-8"))
+
+def current(model: str):
+    p = REG_DIR/model/"CURRENT"
+    return p.read_text(encoding="utf-8").strip() if p.exists() else None
+
+def _source(src_dir: Path, f: str):
+    p = src_dir/f
+    return p if p.exists() or f not in SHARED_FILES else SHARED_FILES[f]
+
+def register(model: str, src_dir: Path = None):
+    src_dir = src_dir or SRC_DIRS[model]
+    hashes = {f: sha256(_source(src_dir, f)) for f in FILES[model]}
+    existing = versions(model)
+    if existing and manifest(model, existing[-1])["files"] == hashes:
+        print(f"{model}: artifacts unchanged since {existing[-1]}; not registering.")
+        return existing[-1]
+    version = f"v{len(existing) + 1:04d}"
+    out = REG_DIR/model/version
+    tmp = REG_DIR/model/f".{version}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True); tmp.mkdir(parents=True)
+    for f in FILES[model]:
+        shutil.copy2(_source(src_dir, f), tmp/f)
+    man = {
+        "model": model, "version": version, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": str(src_dir), "files": hashes,
+        "metrics": json.loads((src_dir/"metrics.json").read_text()) if (src_dir/"metrics.json").exists() else None,
+        "params": json.loads((src_dir/"selected_params.json").read_text()) if (src_dir/"selected_params.json").exists() else None,
+    }
+    (tmp/"manifest.json").write_text(json.dumps(man, indent=2), encoding="utf-8")
+    os.replace(tmp, out)  # version dir appears complete or not at all
+    print(f"{model}: registered {version}")
+    return version
+
+def promote(model: str, version: str):
+    if version not in versions(model):
+        raise ValueError(f"{model} has no version {version}")
+    _write_atomic(REG_DIR/model/"CURRENT", version)
+
+def verify(model: str, version: str):
+    d = REG_DIR/model/version
+    bad = [f for f, h in manifest(model, version)["files"].items() if sha256(d/f) != h]
+    if bad:
+        raise RuntimeError(f"{model}/{version}: hash mismatch for {bad}")
+
+def score_intent(vec, clf, texts):
+    # top intent id + its probability per text; the one scoring path for serving and bulk_score.py
+    proba = clf.predict_proba(vec.transform([normalize_text(t, lowercase=True) for t in texts]))
+    top = proba.argmax(axis=1)
+    return clf.classes_[top], proba[np.arange(len(texts)), top]
+
+class IntentPredictor:
+    def __init__(self, art_dir: Path):
+        import joblib
+        self.vec = joblib.load(art_dir/"tfidf.joblib")
+        self.clf = joblib.load(art_dir/"logreg.joblib")
+        self.labels = json.loads((art_dir/"intent_label_map.json").read_text(encoding="utf-8"))["labels"]
+
+    def predict(self, texts):
+        # (intent_id, intent, confidence) per text
+        if not texts:
+            return []
+        ids, conf = score_intent(self.vec, self.clf, texts)
+        return [(i, self.labels[i], c) for i, c in zip(ids.tolist(), conf.tolist())]
+
+    @staticmethod
+    def agreement(a, b):
+        return float(np.mean([x[0] == y[0] for x, y in zip(a, b)])) if a else 1.0
+
+class NerPredictor:
+    def __init__(self, art_dir: Path):
+        import ner_bilstm_crf
+        self.vocab = ner_bilstm_crf.load_vocab(art_dir/"word_vocab.json", art_dir/"char_vocab.json",
+                                               art_dir/"ner_label_map.json")
+        self.model = ner_bilstm_crf.load_for_inference(art_dir, self.vocab)
+        self._tag_batch = ner_bilstm_crf.tag_batch
+
+    def predict(self, token_lists):
+        if not token_lists:
+            return []
+        return self._tag_batch(self.model, token_lists, self.vocab)
+
+    @staticmethod
+    def agreement(a, b):
+        pairs = [(x, y) for ta, tb in zip(a, b) for x, y in zip(ta, tb)]
+        return float(np.mean([x == y for x, y in pairs])) if pairs else 1.0
+
+PREDICTORS = {"intent": IntentPredictor, "ner": NerPredictor}
+WARMUP = {"intent": ["what is my card balance"], "ner": [["flying", "to", "London", "tomorrow"]]}
+
+def _pin_shadow_thread():
+    # torch's intra-op thread count is per thread: one core for shadow scoring, the rest stay with the primary
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+
+class HotSwapPredictor:
+    """Serves the active registry version; new versions are loaded off the request path and swapped in
+    by a single reference assignment, so in-flight calls finish on the predictor they started with."""
+
+    def __init__(self, model: str, version: str = None, keep: int = KEEP_RESIDENT):
+        self.model, self.keep = model, keep
+        self._resident = {}  # version -> loaded predictor (active, previously active, prewarmed, shadow)
+        self._history = []  # versions in the order they were made active; drives rollback and eviction
+        self._lock = threading.Lock()
+        self._loader = ThreadPoolExecutor(1, thread_name_prefix=f"{model}-prewarm")
+        self._shadow_pool = ThreadPoolExecutor(1, thread_name_prefix=f"{model}-shadow", initializer=_pin_shadow_thread)
+        self._shadow_pending = 0
+        self._shadow = None  # (version, predictor, rate); a new tuple per start_shadow() call
+        self.shadow_stats = {"n": 0, "agree_sum": 0.0, "errors": 0}
+        self._active_version = None
+        version = version or current(model) or versions(model)[-1]
+        self._activate(version, self._load(version))
+
+    def _load(self, version):
+        with self._lock:
+            if version in self._resident:
+                return self._resident[version]
+        verify(self.model, version)
+        p = PREDICTORS[self.model](REG_DIR/self.model/version)
+        p.predict(WARMUP[self.model])  # first call pays lazy init, not the first live request
+        with self._lock:
+            self._resident[version] = p
+            self._evict(version)
+        return p
+
+    def _last_active(self, version):
+        # position of the version's latest activation; never-active (prewarm/shadow only) ranks lowest
+        return max((i for i, v in enumerate(self._history) if v == version), default=-1)
+
+    def _evict(self, loaded):
+        # keep the N most recently active versions; never drop active, shadow or the one just loaded
+        pinned = {self._active_version, loaded, self._shadow[0] if self._shadow else None}
+        while len(self._resident) > self.keep:
+            victims = [v for v in self._resident if v not in pinned]
+            if not victims:
+                break
+            del self._resident[min(victims, key=self._last_active)]
+
+    def _activate(self, version, p):
+        with self._lock:
+            self._resident[version] = p
+            self._active_version, self._active = version, p
+            if not self._history or self._history[-1] != version:
+                self._history.append(version)
+            if self._shadow and self._shadow[0] == version:
+                self._shadow = None
+
+    @property
+    def version(self):
+        return self._active_version
+
+    def resident(self):
+        return list(self._resident)
+
+    def history(self):
+        return list(self._history)
+
+    def prewarm(self, version):
+        """Load + verify + warm `version` in the background; returns a Future."""
+        return self._loader.submit(self._load, version)
+
+    def swap(self, version, persist=True):
+        self._activate(version, self.prewarm(version).result())
+        if persist:
+            promote(self.model, version)
+
+    def rollback(self, persist=True):
+        """Reactivate the most recent previously-active version that is still resident. Versions that
+        were only prewarmed or shadowed are never candidates."""
+        with self._lock:
+            target = next((i for i in range(len(self._history) - 2, -1, -1)
+                           if self._history[i] != self._active_version and self._history[i] in self._resident), None)
+            if target is None:
+                raise RuntimeError(f"{self.model}: no previously active version is resident to roll back to")
+            version, p = self._history[target], self._resident[self._history[target]]
+            del self._history[target + 1:]  # a second rollback walks further back, not forward again
+            self._active_version, self._active = version, p
+        if persist:
+            promote(self.model, version)
+
+    def start_shadow(self, version, rate=0.05):
+        p = self.prewarm(version).result()
+        with self._lock:
+            self._shadow = (version, p, rate)
+            self.shadow_stats = {"n": 0, "agree_sum": 0.0, "errors": 0}
+
+    def stop_shadow(self):
+        self._shadow = None
+
+    def shadow_report(self):
+        s = self.shadow_stats
+        return {"version": self._shadow[0] if self._shadow else None, "n": s["n"], "errors": s["errors"],
+                "agreement": s["agree_sum"] / s["n"] if s["n"] else None}
+
+    def _run_shadow(self, shadow, batch, primary_out):
+        # `shadow` is the tuple this job was sampled for; if start/stop_shadow replaced it while the job
+        # sat in the queue, the result belongs to a candidate that is no longer being measured
+        p = shadow[1]
+        try:
+            agree = p.agreement(primary_out, p.predict(batch))
+            with self._lock:
+                if self._shadow is shadow:
+                    self.shadow_stats["n"] += 1; self.shadow_stats["agree_sum"] += agree
+        except Exception:
+            with self._lock:
+                if self._shadow is shadow:
+                    self.shadow_stats["errors"] += 1
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+
+    def predict(self, batch):
+        p, shadow = self._active, self._shadow
+        out = p.predict(batch)
+        # primary path cost when sampled: one random draw + a queue put; backlog beyond the cap is dropped
+        if shadow and random.random() < shadow[2] and self._shadow_pending < SHADOW_MAX_QUEUE:
+            with self._lock:
+                self._shadow_pending += 1
+            self._shadow_pool.submit(self._run_shadow, shadow, batch, out)
+        return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Local model registry.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("register"); r.add_argument("model", choices=list(FILES)); r.add_argument("--src", type=Path)
+    p = sub.add_parser("promote"); p.add_argument("model", choices=list(FILES)); p.add_argument("version")
+    l = sub.add_parser("list"); l.add_argument("model", choices=list(FILES))
+    args = ap.parse_args()
+
+    if args.cmd == "register":
+        register(args.model, args.src)
+    elif args.cmd == "promote":
+        promote(args.model, args.version)
+        print(f"{args.model}: CURRENT -> {args.version}")
+    else:
+        cur = current(args.model)
+        for v in versions(args.model):
+            m = manifest(args.model, v)
+            print(("* " if v == cur else "  ") + v, m["created"], json.dumps(m["metrics"]))
+
+if __name__ == "__main__":
+    main()
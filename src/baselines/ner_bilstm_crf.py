@@ -1,92 +1,180 @@
 # src/baselines/ner_bilstm_crf.py
-import json, math, random
+import argparse, json, math, random
 from pathlib import Path
 import numpy as np
 import torch
 from torch import nn
 from TorchCRF import CRF
+from arrow_data import ner_split
 
 SEED = 42
 random.seed(SEED); np.random.seed(SEED); torch.manual_seed(SEED)
 
-DATA = Path("data/processed/wnut2017")
-LMAP = json.loads(Path("data/processed/label_maps/ner_label_map.json").read_text(encoding="utf-8"))
-WORDV = json.loads(Path("data/processed/tokenizers/word_vocab.json").read_text(encoding="utf-8"))
+LABEL_MAP = Path("data/processed/label_maps/ner_label_map.json")
+WORD_VOCAB = Path("data/processed/tokenizers/word_vocab.json")
+CHAR_VOCAB = Path("data/processed/tokenizers/char_vocab.json")
+LMAP = json.loads(LABEL_MAP.read_text(encoding="utf-8"))
+WORDV = json.loads(WORD_VOCAB.read_text(encoding="utf-8"))
+CHARV = json.loads(CHAR_VOCAB.read_text(encoding="utf-8"))
 
 TAGS = LMAP["tags"]; TAG2ID = LMAP["tag2id"]
 PAD_TAG = "O"; PAD_TAG_ID = TAG2ID.get(PAD_TAG, 0)
+# ~94% of WNUT tokens are O, so an all-O tagger already scores ~0.92 all-token micro-F1; entity F1 ignores O
+ENTITY_IDS = [i for i in range(len(TAGS)) if i != PAD_TAG_ID]
 
 PAD, UNK = "<pad>", "<unk>"
 WORD2ID = WORDV["word2id"]; PAD_ID, UNK_ID = WORD2ID[PAD], WORD2ID[UNK]
+CHAR2ID = CHARV["char2id"]; CHAR_PAD_ID, CHAR_UNK_ID = CHAR2ID[PAD], CHAR2ID[UNK]
 
 EMB_DIM = 100
 HID_DIM = 128
-EPOCHS = 6
+EPOCHS = 15  # the tagger only starts leaving all-O around epoch 5
 BATCH = 32
 LR = 1e-3
 MAXLEN = 120  # clip long tweets
+MAXCHARS = 24  # clip long words (urls, hashtags); covers 99.3% of the 14,876 vocab words
+CHAR_EMB_DIM = 30
+CHAR_OUT_DIM = 50
 
 ART_DIR = Path("artifacts/baselines/ner"); ART_DIR.mkdir(parents=True, exist_ok=True)
+WORD_ONLY_CKPT = ART_DIR/"ner_bilstm_crf_wordonly.pt"  # comparison model for bench_ner_char.py
 
-def read_jsonl(p: Path):
-    for line in p.open(encoding="utf-8"):
-        yield json.loads(line)
-
-def encode(tokens):
-    ids = [WORD2ID.get(t, UNK_ID) for t in tokens[:MAXLEN]]
+def encode(tokens, word2id=WORD2ID):
+    ids = [word2id.get(t, UNK_ID) for t in tokens[:MAXLEN]]
     return ids
 
+def word_chars(word, char2id=CHAR2ID):
+    ids = [char2id.get(ch, CHAR_UNK_ID) for ch in word[:MAXCHARS]]
+    return ids + [CHAR_PAD_ID]*(MAXCHARS-len(ids))
+
+def build_char_table(word2id=WORD2ID, char2id=CHAR2ID):
+    # padded char ids for every vocab word, computed once; specials stay all-pad
+    table = np.full((len(word2id), MAXCHARS), CHAR_PAD_ID, dtype=np.int64)
+    for w, i in word2id.items():
+        if w not in (PAD, UNK):
+            table[i] = word_chars(w, char2id)
+    return table
+
+CHAR_TABLE = build_char_table()
+VOCAB = {"word2id": WORD2ID, "char2id": CHAR2ID, "tags": TAGS, "char_table": CHAR_TABLE}
+
+def load_vocab(word_path=WORD_VOCAB, char_path=CHAR_VOCAB, label_path=LABEL_MAP):
+    # inference-side lookups from explicit files, e.g. the copies snapshotted with a registry version;
+    # <pad>/<unk> keep ids 0/1 in every vocab, so only the lookups change
+    word2id = json.loads(Path(word_path).read_text(encoding="utf-8"))["word2id"]
+    char2id = json.loads(Path(char_path).read_text(encoding="utf-8"))["char2id"]
+    tags = json.loads(Path(label_path).read_text(encoding="utf-8"))["tags"]
+    return {"word2id": word2id, "char2id": char2id, "tags": tags, "char_table": build_char_table(word2id, char2id)}
+
+def encode_chars(tokens, ids, vocab=VOCAB):
+    # known words are a row lookup; only OOV tokens are spelled out char by char
+    out = vocab["char_table"][ids]
+    for j, i in enumerate(ids):
+        if i == UNK_ID:
+            out[j] = word_chars(tokens[j], vocab["char2id"])
+    return out
+
 def pad_batch(seqs, pad_id):
     maxlen = max(len(s) for s in seqs)
     return [s + [pad_id]*(maxlen-len(s)) for s in seqs], maxlen
 
+def pad_chars(chars, maxlen):
+    out = np.full((len(chars), maxlen, MAXCHARS), CHAR_PAD_ID, dtype=np.int64)
+    for k, c in enumerate(chars):
+        out[k, :len(c)] = c
+    return out
+
+def encode_batch(toks, vocab=VOCAB):
+    ids = [encode(ts, vocab["word2id"]) for ts in toks]
+    chars = [encode_chars(ts, xs, vocab) for ts, xs in zip(toks, ids)]
+    x, maxlen = pad_batch(ids, PAD_ID)
+    c = pad_chars(chars, maxlen)
+    mask = [[1 if j < len(xs) else 0 for j in range(maxlen)] for xs in ids]
+    return torch.tensor(x, dtype=torch.long), torch.from_numpy(c), torch.tensor(mask, dtype=torch.bool)
+
+class CharCNN(nn.Module):
+    def __init__(self, n_chars):
+        super().__init__()
+        self.emb = nn.Embedding(n_chars, CHAR_EMB_DIM, padding_idx=CHAR_PAD_ID)
+        self.conv = nn.Conv1d(CHAR_EMB_DIM, CHAR_OUT_DIM, kernel_size=3, padding=1)
+
+    def forward(self, c):
+        # c: (n_words, MAXCHARS) -> (n_words, CHAR_OUT_DIM), max-pooled over real chars
+        h = torch.relu(self.conv(self.emb(c).transpose(1, 2)))
+        h = h.masked_fill((c == CHAR_PAD_ID).unsqueeze(1), 0.0)
+        return h.max(dim=2).values
+
 class BiLSTM_CRF(nn.Module):
-    def __init__(self, vocab_size, tagset_size):
+    def __init__(self, vocab_size, tagset_size, n_chars=0):
         super().__init__()
+        self.use_chars = n_chars > 0
         self.emb = nn.Embedding(vocab_size, EMB_DIM, padding_idx=PAD_ID)
-        self.lstm = nn.LSTM(EMB_DIM, HID_DIM//2, num_layers=1, bidirectional=True, batch_first=True)
+        if self.use_chars:
+            self.char_cnn = CharCNN(n_chars)
+        in_dim = EMB_DIM + (CHAR_OUT_DIM if self.use_chars else 0)
+        self.lstm = nn.LSTM(in_dim, HID_DIM//2, num_layers=1, bidirectional=True, batch_first=True)
         self.fc = nn.Linear(HID_DIM, tagset_size)
         self.crf = CRF(tagset_size, batch_first=True)
+        # char-CNN output per vocab word, filled by build_char_cache() after training
+        self.register_buffer("char_cache", None, persistent=False)
+
+    @torch.no_grad()
+    def build_char_cache(self, chunk=4096):
+        self.eval()
+        table = torch.from_numpy(CHAR_TABLE)
+        self.char_cache = torch.cat([self.char_cnn(table[i:i+chunk]) for i in range(0, len(table), chunk)])
+        return self.char_cache
+
+    def char_feats(self, x, c):
+        if self.training or self.char_cache is None:
+            return self.char_cnn(c.reshape(-1, MAXCHARS)).view(*x.shape, CHAR_OUT_DIM)
+        # inference: known words hit the cache, only OOV tokens run the CNN
+        feats = self.char_cache[x]
+        oov = x == UNK_ID
+        if oov.any():
+            feats[oov] = self.char_cnn(c[oov])
+        return feats
 
-    def forward(self, x, mask):
+    def forward(self, x, mask, c=None):
         emb = self.emb(x)
+        if self.use_chars:
+            emb = torch.cat([emb, self.char_feats(x, c)], dim=-1)
         out,_ = self.lstm(emb)
         emissions = self.fc(out)
         return emissions
 
 def batch_iter(split):
-    data = list(read_jsonl(DATA/f"{split}.jsonl"))
+    tokens, tag_seqs = ner_split(split)
+    order = list(range(len(tokens)))
     # shuffle only for train
     if split == "train":
-        random.shuffle(data)
-    for i in range(0, len(data), BATCH):
-        batch = data[i:i+BATCH]
-        toks = [ex["tokens"] for ex in batch]
-        tags = [ex["tags"] for ex in batch]
-        x = [encode(ts) for ts in toks]
+        random.shuffle(order)
+    for i in range(0, len(order), BATCH):
+        idx = order[i:i+BATCH]
+        toks = [tokens[k] for k in idx]
+        tags = [tag_seqs[k] for k in idx]
+        x, c, mask = encode_batch(toks)
         y = [[TAG2ID.get(t, PAD_TAG_ID) for t in ts[:MAXLEN]] for ts in tags]
-        x, _ = pad_batch(x, PAD_ID)
-        y, maxlen = pad_batch(y, PAD_TAG_ID)
-        mask = [[1 if j < len(batch[k]["tokens"]) and j < MAXLEN else 0 for j in range(maxlen)] for k in range(len(batch))]
-        yield torch.tensor(x, dtype=torch.long), torch.tensor(y, dtype=torch.long), torch.tensor(mask, dtype=torch.bool)
+        y, _ = pad_batch(y, PAD_TAG_ID)
+        yield x, c, torch.tensor(y, dtype=torch.long), mask
 
 def train_epoch(model, opt):
     model.train()
     total = 0.0
-    for x, y, mask in batch_iter("train"):
+    for x, c, y, mask in batch_iter("train"):
         opt.zero_grad()
-        emissions = model(x, mask)
+        emissions = model(x, mask, c)
         loss = -model.crf(emissions, y, mask=mask, reduction="mean")
         loss.backward(); opt.step()
         total += loss.item()
     return total
 
 @torch.no_grad()
-def evaluate(model, split):
+def evaluate(model, split, labels=None):
     model.eval()
     all_true, all_pred = [], []
-    for x, y, mask in batch_iter(split):
-        emissions = model(x, mask)
+    for x, c, y, mask in batch_iter(split):
+        emissions = model(x, mask, c)
         pred = model.crf.decode(emissions, mask=mask)
         # flatten masked tokens
         for i in range(len(pred)):
@@ -99,35 +187,70 @@ def evaluate(model, split):
 
             all_true.extend(y_i.tolist())
             all_pred.extend(p_i.tolist())
-    # micro-F1 over all tokens
+    # micro-F1 over all tokens, or over `labels` only (e.g. entity tags without O)
     from sklearn.metrics import f1_score
-    f1 = f1_score(all_true, all_pred, average="micro")
+    f1 = f1_score(all_true, all_pred, labels=labels, average="micro", zero_division=0)
     return f1
 
-def main():
-    vocab_size = len(WORD2ID)
-    tagset_size = len(TAGS)
-    model = BiLSTM_CRF(vocab_size, tagset_size)
-    opt = torch.optim.AdamW(model.parameters(), lr=LR)
+@torch.no_grad()
+def tag_batch(model, toks, vocab=VOCAB):
+    # request-time entry point: raw token lists in, tag strings out
+    if not toks:
+        return []
+    model.eval()
+    x, c, mask = encode_batch(toks, vocab)
+    pred = model.crf.decode(model(x, mask, c), mask=mask)
+    return [[vocab["tags"][t] for t in p] for p in pred]
+
+def load_for_inference(art_dir=ART_DIR, vocab=VOCAB):
+    model = BiLSTM_CRF(len(vocab["word2id"]), len(vocab["tags"]), n_chars=len(vocab["char2id"]))
+    model.load_state_dict(torch.load(art_dir/"ner_bilstm_crf.pt"))
+    model.char_cache = torch.load(art_dir/"ner_char_cache.pt")
+    return model.eval()
 
+def fit(model, ckpt):
+    opt = torch.optim.AdamW(model.parameters(), lr=LR)
     best_val = -1.0
     history = []
     for ep in range(1, EPOCHS+1):
         loss = train_epoch(model, opt)
         f1_tr = evaluate(model, "train")
         f1_va = evaluate(model, "val")
-        history.append({"epoch": ep, "loss": loss, "train_f1": f1_tr, "val_f1": f1_va})
-        print(f"Epoch {ep}: loss={loss:.3f} train_f1={f1_tr:.3f} val_f1={f1_va:.3f}")
-        if f1_va > best_val:
-            best_val = f1_va
-            torch.save(model.state_dict(), ART_DIR/"ner_bilstm_crf.pt")
+        ent_va = evaluate(model, "val", ENTITY_IDS)
+        history.append({"epoch": ep, "loss": loss, "train_f1": f1_tr, "val_f1": f1_va, "val_entity_f1": ent_va})
+        print(f"Epoch {ep}: loss={loss:.3f} train_f1={f1_tr:.3f} val_f1={f1_va:.3f} val_entity_f1={ent_va:.3f}")
+        # select on entity F1: all-token micro-F1 ties at the all-O rate and would keep epoch 1
+        if ent_va > best_val:
+            best_val = ent_va
+            torch.save(model.state_dict(), ckpt)
+    model.load_state_dict(torch.load(ckpt))
+    return history
+
+def main():
+    ap = argparse.ArgumentParser(description="Train the WNUT-17 BiLSTM-CRF.")
+    ap.add_argument("--word-only", action="store_true",
+                    help="train the no-char comparison model (for bench_ner_char.py) instead of the baseline")
+    args = ap.parse_args()
+
+    vocab_size = len(WORD2ID)
+    tagset_size = len(TAGS)
+    if args.word_only:
+        model = BiLSTM_CRF(vocab_size, tagset_size)
+        fit(model, WORD_ONLY_CKPT)
+        print("NER word-only:", {"test_micro_f1": evaluate(model, "test"),
+                                 "test_entity_f1": evaluate(model, "test", ENTITY_IDS)})
+        return
+    model = BiLSTM_CRF(vocab_size, tagset_size, n_chars=len(CHAR2ID))
+    history = fit(model, ART_DIR/"ner_bilstm_crf.pt")
+    # freeze char features for every vocab word so serving only runs the CNN on OOV tokens
+    torch.save(model.build_char_cache(), ART_DIR/"ner_char_cache.pt")
 
     # final test using best weights
-    model.load_state_dict(torch.load(ART_DIR/"ner_bilstm_crf.pt"))
     f1_tr = evaluate(model, "train")
     f1_va = evaluate(model, "val")
     f1_te = evaluate(model, "test")
-    metrics = {"train_micro_f1": f1_tr, "val_micro_f1": f1_va, "test_micro_f1": f1_te}
+    metrics = {"train_micro_f1": f1_tr, "val_micro_f1": f1_va, "test_micro_f1": f1_te,
+               "val_entity_f1": evaluate(model, "val", ENTITY_IDS), "test_entity_f1": evaluate(model, "test", ENTITY_IDS)}
     (ART_DIR/"metrics.json").write_text(json.dumps(metrics, indent=2))
     # also save training curve
     Path(ART_DIR/"training_history.json").write_text(json.dumps(history, indent=2))
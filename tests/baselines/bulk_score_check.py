@@ -0,0 +1,87 @@
+# tests/baselines/bulk_score_check.py
+# Runs bulk_score.py end to end on small CSV / JSONL / Parquet inputs: stop after a few chunks, resume,
+# then check the merged output is one row per input row (contiguous, unique row_id), tokens and ner_tags
+# line up, and string values like "007" / "NA" / null survive reading untouched.
+import json, subprocess, sys, tempfile
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+sys.path.append("src/baselines")
+from arrow_data import banking77_split
+from ner_bilstm_crf import MAXLEN
+
+N_ROWS = 1050
+CHUNK_ROWS = 100  # 11 chunks, the last one short
+FIRST_RUN_CHUNKS = 4
+SPECIAL = ["007", None, "NA", "null", " ".join(["word"] * (MAXLEN + 30))]  # last one is longer than MAXLEN
+
+def build_rows():
+    texts = SPECIAL + banking77_split("test")["text_norm"][:N_ROWS - len(SPECIAL)].tolist()
+    tokens = [None if t is None else t.split() for t in texts]
+    tokens[0] = ["0012"]
+    return texts, tokens
+
+def write_inputs(root: Path, texts, tokens):
+    csv = root/"in.csv"
+    # CSV has no null: the missing text is an empty cell, "NA"/"null" must stay literal strings
+    pd.DataFrame({"text": ["" if t is None else t for t in texts]}).to_csv(csv, index=False)
+    jsonl = root/"in.jsonl"
+    with jsonl.open("w", encoding="utf-8") as f:
+        for t, ts in zip(texts, tokens):
+            f.write(json.dumps({"text": t, "tokens": ts}) + "\n")
+    parquet = root/"in.parquet"
+    pq.write_table(pa.table({"text": texts}), parquet, row_group_size=3 * CHUNK_ROWS)
+    return csv, jsonl, parquet
+
+def run(inp: Path, out: Path, *extra):
+    cmd = [sys.executable, "-W", "ignore", "src/baselines/bulk_score.py", str(inp), "--out", str(out),
+           "--chunk-rows", str(CHUNK_ROWS), "--workers", "2", *extra]
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return json.loads((out/"_summary.json").read_text())
+
+def main():
+    ok = True
+    def check(name, cond):
+        nonlocal ok
+        print(("PASS" if cond else "FAIL") + ":", name)
+        ok &= bool(cond)
+
+    texts, tokens = build_rows()
+    n_chunks = -(-N_ROWS // CHUNK_ROWS)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv, jsonl, parquet = write_inputs(Path(tmp), texts, tokens)
+        for inp, extra in [(csv, ()), (jsonl, ("--tokens-col", "tokens")), (parquet, ())]:
+            name, out = inp.suffix[1:], Path(tmp)/f"out_{inp.suffix[1:]}"
+            first = run(inp, out, "--max-chunks", str(FIRST_RUN_CHUNKS), *extra)
+            early = {p.name: p.stat().st_mtime_ns for p in out.glob("part-*.parquet")}
+            second = run(inp, out, *extra)
+            check(f"{name}: first run stops at --max-chunks", first["chunks_done"] == FIRST_RUN_CHUNKS)
+            check(f"{name}: resume scores only the remaining rows",
+                  second["chunks_done"] == n_chunks and first["rows_scored"] + second["rows_scored"] == N_ROWS)
+            check(f"{name}: finished parts are not rewritten on resume",
+                  all((out/p).stat().st_mtime_ns == t for p, t in early.items()))
+
+            df = pq.read_table(out).to_pandas().sort_values("row_id", ignore_index=True)
+            check(f"{name}: row_id contiguous and unique", df["row_id"].tolist() == list(range(N_ROWS)))
+            check(f"{name}: len(tokens) == len(ner_tags) on every row",
+                  all(len(a) == len(b) for a, b in zip(df["tokens"], df["ner_tags"])))
+            check(f"{name}: over-length text clipped", len(df["tokens"][4]) == MAXLEN)
+            if inp is jsonl:
+                check("jsonl: tokens column keeps '0012'", list(df["tokens"][0]) == ["0012"])
+            else:
+                check(f"{name}: '007' kept as text", list(df["tokens"][0]) == ["007"])
+            check(f"{name}: 'NA' / 'null' strings are scored as text",
+                  [list(df["tokens"][i]) for i in (2, 3)] == [["NA"], ["null"]] and not df["intent"][2:4].isna().any())
+            missing = df["intent"][1]
+            if inp is csv:
+                check("csv: empty cell is scored as empty text", not pd.isna(missing) and len(df["tokens"][1]) == 0)
+            else:
+                check(f"{name}: null text gives null intent and no tokens",
+                      pd.isna(missing) and pd.isna(df["intent_conf"][1]) and len(df["tokens"][1]) == 0)
+
+    print("\nBULK SCORE CHECK:", "PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
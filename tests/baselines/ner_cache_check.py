@@ -0,0 +1,42 @@
+# tests/baselines/ner_cache_check.py
+# The per-word char cache must be a pure speed-up: emissions with the cache (known words looked up,
+# OOV tokens through the CNN) must equal emissions with the CNN run on every token.
+import sys
+sys.path.append("src/baselines")
+import torch
+from arrow_data import ner_split
+from ner_bilstm_crf import CHAR2ID, TAGS, UNK_ID, WORD2ID, BiLSTM_CRF, encode_batch
+
+MAX_ABS_DIFF = 1e-6
+EXTRA_OOV = [["zzqxv", "🦜🦜", "https://example.com/" + "a" * 60, "@never_seen_handle", "Ünïcödé"]]
+
+def main():
+    ok = True
+    model = BiLSTM_CRF(len(WORD2ID), len(TAGS), n_chars=len(CHAR2ID))  # seeded random weights suffice
+    model.build_char_cache()
+    sents = ner_split("test")[0][:200] + EXTRA_OOV
+    x, c, mask = encode_batch(sents)
+    n_oov = int(((x == UNK_ID) & mask).sum())
+    n_known = int(((x != UNK_ID) & mask).sum())
+    print(f"tokens: known={n_known} oov={n_oov}")
+    if n_oov == 0 or n_known == 0:
+        print("FAIL: batch must contain both known and OOV tokens."); ok = False
+
+    with torch.no_grad():
+        model.eval()
+        cached = model(x, mask, c)
+        cache, model.char_cache = model.char_cache, None
+        uncached = model(x, mask, c)
+        model.char_cache = cache
+    diff = (cached - uncached).abs()
+    d_all = float(diff.max())
+    d_oov = float(diff[x == UNK_ID].max())
+    print(f"max |emissions cached - uncached|: all={d_all:.3g} oov_positions={d_oov:.3g}")
+    if d_all > MAX_ABS_DIFF:
+        print("FAIL: char cache changes emissions."); ok = False
+
+    print("\nNER CHAR CACHE CHECK:", "PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
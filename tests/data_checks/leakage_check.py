@@ -1,19 +1,14 @@
 # tests/data_checks/leakage_check.py
-import json
-from pathlib import Path
+import sys
+sys.path.append("src/baselines")
+from arrow_data import banking77_table, ner_table
 
-def load_csv_texts(path: Path):
-    import pandas as pd
-    df = pd.read_csv(path)
-    return set(df["text_norm"].astype(str).tolist())
+def load_split_texts(split: str):
+    # only the text_norm column is paged in from the memory-mapped split
+    return set(str(t) for t in banking77_table(split, ["text_norm"]).column("text_norm").to_pylist())
 
-def load_jsonl_sentences(path: Path):
-    s = set()
-    with path.open(encoding="utf-8") as f:
-        for line in f:
-            ex = json.loads(line)
-            s.add(" ".join(ex["tokens"]))
-    return s
+def load_ner_sentences(split: str):
+    return set(" ".join(toks) for toks in ner_table(split).column("tokens").to_pylist())
 
 def check_disjoint(name, a, b, c):
     inter_ab = a & b
@@ -23,18 +18,16 @@ def check_disjoint(name, a, b, c):
     return ok, {"ab": len(inter_ab), "ac": len(inter_ac), "bc": len(inter_bc)}
 
 def banking77():
-    base = Path("data/processed/banking77")
-    tr = load_csv_texts(base / "train.csv")
-    va = load_csv_texts(base / "val.csv")
-    te = load_csv_texts(base / "test.csv")
+    tr = load_split_texts("train")
+    va = load_split_texts("val")
+    te = load_split_texts("test")
     ok, overlaps = check_disjoint("banking77", tr, va, te)
     return ok, overlaps
 
 def wnut2017():
-    base = Path("data/processed/wnut2017")
-    tr = load_jsonl_sentences(base / "train.jsonl")
-    va = load_jsonl_sentences(base / "val.jsonl")
-    te = load_jsonl_sentences(base / "test.jsonl")
+    tr = load_ner_sentences("train")
+    va = load_ner_sentences("val")
+    te = load_ner_sentences("test")
     ok, overlaps = check_disjoint("wnut2017", tr, va, te)
     return ok, overlaps
 